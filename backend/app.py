@@ -1,6 +1,7 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models.database import db, init_db
 from models.candidate import Candidate
 from models.interview import Interview
@@ -9,10 +10,20 @@ from models.answer import Answer
 from services.resume_service import ResumeService
 from services.ai_service import AIService
 from services.interview_service import InterviewService
+from services.rate_limiter import RateLimiter, IdempotencyStore
+from services.analytics_service import AnalyticsService
+from services.retention_service import RetentionService
+from services.serializer import json_response, requested_fields, select_fields
+from functools import wraps
 import os
 from datetime import datetime
 
 app = Flask(__name__)
+# Behind a reverse proxy, trust only the X-Forwarded-For entries its hops append;
+# with no proxy (the default) the header is client-controlled and ignored
+trusted_proxy_hops = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+if trusted_proxy_hops > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxy_hops)
 app.config['SECRET_KEY'] = 'your-secret-key'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///interview_assistant.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -26,10 +37,50 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 resume_service = ResumeService()
 ai_service = AIService()
 interview_service = InterviewService()
+rate_limiter = RateLimiter(max_in_flight=int(os.environ.get('MAX_LLM_IN_FLIGHT', 8)))
+idempotency_store = IdempotencyStore()
+analytics_service = AnalyticsService()
+retention_service = RetentionService()
 
 # Initialize database
 with app.app_context():
     init_db()
+    # Warm the near-duplicate index with the questions of interviews still in progress
+    ai_service.question_index.add_many(
+        db.session.query(Question.question_text, Question.interview_id)
+            .join(Interview, Interview.id == Question.interview_id)
+            .filter(Interview.status != 'completed').all()
+    )
+    # Materialize the leaderboard and score aggregates once; later writes update them incrementally
+    analytics_service.load(
+        Candidate.query.all(),
+        Interview.query.order_by(Interview.started_at, Interview.id).all(),
+        db.session.query(Question.interview_id, Question.id, Question.difficulty, Answer.score, Answer.time_taken)
+            .join(Answer, Answer.question_id == Question.id).order_by(Answer.id).all()
+    )
+
+def client_ip():
+    """Get the client IP (resolved by ProxyFix when TRUSTED_PROXY_HOPS is set)"""
+    return request.remote_addr
+
+def too_many_requests(retry_after, message='Too many requests, please retry later'):
+    return jsonify({'error': message}), 429, {'Retry-After': RateLimiter.retry_after(retry_after)}
+
+def llm_backed(route):
+    """Apply the per-IP rate limit and the global in-flight cap to an LLM-backed route"""
+    @wraps(route)
+    def wrapper(*args, **kwargs):
+        wait = rate_limiter.check('ip', client_ip())
+        if wait:
+            return too_many_requests(wait)
+        
+        if not rate_limiter.acquire():
+            return too_many_requests(1, 'Server is busy, please retry shortly')
+        try:
+            return route(*args, **kwargs)
+        finally:
+            rate_limiter.release()
+    return wrapper
 
 @app.route('/api/upload-resume', methods=['POST'])
 def upload_resume():
@@ -61,11 +112,16 @@ def upload_resume():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/start-interview', methods=['POST'])
+@llm_backed
 def start_interview():
     try:
         data = request.json
         candidate_data = data.get('candidate')
         
+        wait = rate_limiter.check('candidate', candidate_data['email'])
+        if wait:
+            return too_many_requests(wait)
+        
         # Create or update candidate
         candidate = Candidate.query.filter_by(email=candidate_data['email']).first()
         if not candidate:
@@ -85,9 +141,10 @@ def start_interview():
         )
         db.session.add(interview)
         db.session.commit()
+        analytics_service.interview_started(candidate, interview)
         
         # Generate first question
-        first_question = ai_service.generate_question(1, 'easy')
+        first_question = ai_service.generate_question(1, 'easy', interview.id)
         
         # Save question to database
         question = Question(
@@ -98,6 +155,7 @@ def start_interview():
         )
         db.session.add(question)
         db.session.commit()
+        ai_service.question_index.add(first_question, interview.id)
         
         return jsonify({
             'success': True,
@@ -115,18 +173,35 @@ def start_interview():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/submit-answer', methods=['POST'])
+@llm_backed
 def submit_answer():
+    claimed_key = None
     try:
         data = request.json
         question_id = data.get('question_id')
         answer_text = data.get('answer')
         time_taken = data.get('time_taken', 0)
         
+        # Duplicate submissions get the stored result instead of being re-scored
+        # Scoped to the question so a key reused by another client cannot return their result
+        idempotency_key = f"submit-answer:{question_id}:{request.headers.get('Idempotency-Key') or ''}"
+        claimed, stored = idempotency_store.begin(idempotency_key)
+        if not claimed:
+            if stored is IdempotencyStore.PENDING:
+                return too_many_requests(1, 'Answer is already being processed')
+            return jsonify(stored)
+        # Only the request that claimed the key may release it
+        claimed_key = idempotency_key
+        
         # Get question
         question = Question.query.get(question_id)
         if not question:
             return jsonify({'error': 'Question not found'}), 404
         
+        wait = rate_limiter.check('interview', question.interview_id)
+        if wait:
+            return too_many_requests(wait)
+        
         # Score the answer
         score = ai_service.score_answer(question.question_text, answer_text, question.difficulty)
         
@@ -142,12 +217,14 @@ def submit_answer():
         
         # Check if interview is complete
         interview = question.interview
+        analytics_service.answer_recorded(interview.id, question.id, question.difficulty, score, time_taken)
         total_questions = Question.query.filter_by(interview_id=interview.id).count()
         
         if total_questions >= 6:
             # Interview complete
             interview.status = 'completed'
             interview.completed_at = datetime.utcnow()
+            ai_service.question_index.remove(interview.id)
             
             # Prepare interview data for AI summary
             candidate = Candidate.query.get(interview.candidate_id)
@@ -173,13 +250,14 @@ def submit_answer():
             interview.summary = summary
             
             db.session.commit()
+            analytics_service.interview_updated(interview.candidate_id, interview)
             
-            return jsonify({
+            result = {
                 'success': True,
                 'interview_complete': True,
                 'summary': summary,
                 'final_score': interview.calculate_final_score()
-            })
+            }
         else:
             # Generate next question
             next_question_number = total_questions + 1
@@ -193,7 +271,7 @@ def submit_answer():
                 difficulty = 'hard'
                 time_limit = 120
             
-            next_question_text = ai_service.generate_question(next_question_number, difficulty)
+            next_question_text = ai_service.generate_question(next_question_number, difficulty, interview.id)
             
             # Save next question
             next_question = Question(
@@ -204,8 +282,9 @@ def submit_answer():
             )
             db.session.add(next_question)
             db.session.commit()
+            ai_service.question_index.add(next_question_text, interview.id)
             
-            return jsonify({
+            result = {
                 'success': True,
                 'interview_complete': False,
                 'next_question': {
@@ -215,44 +294,58 @@ def submit_answer():
                     'number': next_question_number,
                     'time_limit': time_limit
                 }
-            })
+            }
+        
+        idempotency_store.complete(idempotency_key, result)
+        return jsonify(result)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    finally:
+        # Lets the client retry when the request failed before a result was stored
+        if claimed_key:
+            idempotency_store.abandon(claimed_key)
 
 @app.route('/api/candidates', methods=['GET'])
 def get_candidates():
     try:
-        candidates = Candidate.query.all()
+        # Served from the materialized leaderboard, already sorted by score (highest first)
+        fields = requested_fields()
         candidate_list = []
+        for entry in analytics_service.top():
+            del entry['interview_id']
+            candidate_list.append(select_fields(entry, fields))
         
-        for candidate in candidates:
-            latest_interview = Interview.query.filter_by(
-                candidate_id=candidate.id
-            ).order_by(Interview.started_at.desc()).first()
-            
-            if latest_interview:
-                candidate_list.append({
-                    'id': candidate.id,
-                    'name': candidate.name,
-                    'email': candidate.email,
-                    'phone': candidate.phone,
-                    'final_score': latest_interview.calculate_final_score(),
-                    'status': latest_interview.status,
-                    'completed_at': latest_interview.completed_at.isoformat() if latest_interview.completed_at else None
-                })
+        return json_response({
+            'success': True,
+            'candidates': candidate_list
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    try:
+        top = request.args.get('top', 10, type=int)
         
-        # Sort by score (highest first)
-        candidate_list.sort(key=lambda x: x['final_score'], reverse=True)
+        analytics = analytics_service.get_summary()
+        analytics['leaderboard'] = analytics_service.top(max(top, 0))
         
-        return jsonify({
+        return json_response({
             'success': True,
-            'candidates': candidate_list
+            'analytics': analytics
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Keys of each question entry in the candidate detail payload
+QUESTION_FIELDS = {'id', 'text', 'difficulty', 'number', 'answer', 'score', 'time_taken'}
+# Always kept so filtered entries can be matched back to their questions
+QUESTION_KEY_FIELDS = ('id', 'number')
+
 @app.route('/api/candidate/<int:candidate_id>', methods=['GET'])
 def get_candidate_details(candidate_id):
     try:
@@ -269,36 +362,58 @@ def get_candidate_details(candidate_id):
         
         questions = Question.query.filter_by(interview_id=interview.id).order_by(Question.question_number).all()
         
-        interview_data = {
-            'id': interview.id,
-            'status': interview.status,
-            'started_at': interview.started_at.isoformat(),
-            'completed_at': interview.completed_at.isoformat() if interview.completed_at else None,
-            'summary': interview.summary,
-            'final_score': interview.calculate_final_score(),
-            'questions': []
-        }
+        # Load every answer in one query, keeping the first answer per question
+        answers = {}
+        if questions:
+            for answer in Answer.query.filter(
+                Answer.question_id.in_([question.id for question in questions])
+            ).order_by(Answer.id).all():
+                answers.setdefault(answer.question_id, answer)
+        
+        # Questions are only filtered when one of their own fields is named,
+        # so ?fields=summary still returns full questions
+        fields = requested_fields()
+        question_fields = None
+        if fields and fields & (QUESTION_FIELDS - set(QUESTION_KEY_FIELDS)):
+            question_fields = fields & QUESTION_FIELDS
+        
+        # Old interviews keep their text in the compressed archive; skip it when no text field is wanted
+        wants_text = (
+            fields is None or 'summary' in fields
+            or question_fields is None or bool(question_fields & {'text', 'answer'})
+        )
+        archive = retention_service.load_archive(interview.id) if wants_text and interview.status == 'completed' else None
         
-        for question in questions:
-            answer = Answer.query.filter_by(question_id=question.id).first()
-            interview_data['questions'].append({
-                'id': question.id,
-                'text': question.question_text,
-                'difficulty': question.difficulty,
-                'number': question.question_number,
-                'answer': answer.answer_text if answer else None,
-                'score': answer.score if answer else None,
-                'time_taken': answer.time_taken if answer else None
-            })
+        interview_data = interview.to_dict()
+        del interview_data['candidate_id']
+        if archive:
+            interview_data['summary'] = archive['summary']
         
-        return jsonify({
+        question_list = []
+        for question in questions:
+            question_data = question.to_dict()
+            answer_data = answers[question.id].to_dict() if question.id in answers else None
+            if archive:
+                question_data['question_text'] = archive['questions'].get(question.id, question_data['question_text'])
+                if answer_data:
+                    answer_data['answer_text'] = archive['answers'].get(answer_data['id'], answer_data['answer_text'])
+            
+            question_list.append(select_fields({
+                'id': question_data['id'],
+                'text': question_data['question_text'],
+                'difficulty': question_data['difficulty'],
+                'number': question_data['question_number'],
+                'answer': answer_data['answer_text'] if answer_data else None,
+                'score': answer_data['score'] if answer_data else None,
+                'time_taken': answer_data['time_taken'] if answer_data else None
+            }, question_fields, QUESTION_KEY_FIELDS))
+        
+        interview_data = select_fields(interview_data, fields)
+        interview_data['questions'] = question_list
+        
+        return json_response({
             'success': True,
-            'candidate': {
-                'id': candidate.id,
-                'name': candidate.name,
-                'email': candidate.email,
-                'phone': candidate.phone
-            },
+            'candidate': candidate.to_dict(),
             'interview': interview_data
         })
     
@@ -383,6 +498,18 @@ def resume_interview():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai-stats', methods=['GET'])
+def get_ai_stats():
+    try:
+        return json_response({
+            'success': True,
+            'latency': ai_service.get_latency_stats(),
+            'token_usage': ai_service.get_token_usage()
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # WebSocket events
 @socketio.on('connect')
 def handle_connect():
@@ -398,6 +525,14 @@ def handle_sync(data):
     # Broadcast to all connected clients
     emit('data_updated', data, broadcast=True)
 
+def run_retention():
+    """Periodically archive old interviews and compact the database"""
+    while True:
+        with app.app_context():
+            retention_service.run()
+        socketio.sleep(retention_service.interval_hours * 3600)
+
 if __name__ == '__main__':
+    socketio.start_background_task(run_retention)
     port = int(os.environ.get('PORT', 5000))
     socketio.run(app, debug=False, host='0.0.0.0', port=port, allow_unsafe_werkzeug=True)
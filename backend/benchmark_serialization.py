@@ -0,0 +1,46 @@
+"""Benchmark payload size and serialization time of the read endpoints
+
+Usage: python benchmark_serialization.py [iterations]
+
+Runs against the local database, so populate it with some interviews first.
+"""
+import gzip
+import json
+import sys
+import time
+from app import app, analytics_service
+from services.serializer import dumps, brotli
+
+
+def time_it(function, payload, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function(payload)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    client = app.test_client()
+
+    endpoints = ['/api/candidates', '/api/candidates?fields=id,name,final_score,status', '/api/analytics']
+    top = analytics_service.top(1)
+    if top:
+        endpoints.append(f"/api/candidate/{top[0]['id']}")
+        endpoints.append(f"/api/candidate/{top[0]['id']}?fields=id,number,difficulty,score,time_taken,final_score")
+
+    print(f"{'endpoint':<80} {'raw B':>8} {'gzip B':>8} {'br B':>8} {'json us':>9} {'fast us':>9}")
+    for endpoint in endpoints:
+        payload = client.get(endpoint).get_json()
+        raw = dumps(payload)
+        gzip_size = len(gzip.compress(raw, compresslevel=6))
+        br_size = len(brotli.compress(raw, quality=5)) if brotli else '-'
+
+        stdlib_us = time_it(lambda p: json.dumps(p).encode('utf-8'), payload, iterations)
+        fast_us = time_it(dumps, payload, iterations)
+
+        print(f"{endpoint:<80} {len(raw):>8} {gzip_size:>8} {br_size:>8} {stdlib_us:>9.1f} {fast_us:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+from models.database import db
+from datetime import datetime
+
+class InterviewArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'), unique=True, nullable=False)
+    codec = db.Column(db.String(10), nullable=False)  # zstd, zlib
+    payload = db.Column(db.LargeBinary, nullable=False)  # compressed JSON of question, answer and summary text
+    original_size = db.Column(db.Integer, nullable=False)  # in bytes
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'interview_id': self.interview_id,
+            'codec': self.codec,
+            'original_size': self.original_size,
+            'compressed_size': len(self.payload),
+            'archived_at': self.archived_at.isoformat()
+        }
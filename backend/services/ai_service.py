@@ -1,7 +1,14 @@
 import os
 from groq import Groq
+from services.prompt_builder import PromptBuilder, ListField
+from services.local_scorer import LocalScorer
+from services.question_index import QuestionIndex
+from services.model_router import ModelRouter
 
 class AIService:
+    # Generation attempts before falling back when the model keeps repeating itself
+    MAX_QUESTION_ATTEMPTS = 3
+    
     def __init__(self):
         # Initialize Groq client with API key from environment
         self.api_key = os.getenv('GROQ_API_KEY', '')
@@ -14,53 +21,99 @@ class AIService:
         except Exception as e:
             print(f"Error initializing Groq client: {e}")
             self.client = None
+        
+        self.prompt_builder = PromptBuilder()
+        self.local_scorer = LocalScorer()
+        self.question_index = QuestionIndex()
+        self.router = ModelRouter()
     
     def set_api_key(self, api_key):
         """Set the Groq API key"""
         self.api_key = api_key
         self.client = Groq(api_key=api_key)
     
-    def generate_question(self, question_number, difficulty):
-        """Generate interview question based on difficulty and question number"""
+    def get_token_usage(self):
+        """Get prompt/completion token totals per call type"""
+        return self.prompt_builder.get_usage_totals()
+    
+    def get_latency_stats(self):
+        """Get per-route model latency percentiles"""
+        return self.router.get_latency_stats()
+    
+    def generate_question(self, question_number, difficulty, interview_id=None):
+        """Generate interview question based on difficulty and question number
+
+        The caller adds the question to question_index once it is saved.
+        """
         if not self.client:
-            return self._get_fallback_question(question_number, difficulty)
+            return self._get_fallback_question(question_number, difficulty, interview_id)
         
         try:
-            prompt = f"""
-            Generate a technical interview question for a Full Stack Developer position (React/Node.js).
-            
-            Question Number: {question_number}
-            Difficulty: {difficulty}
-            
-            Please generate a specific, practical question that tests:
-            - React concepts (components, hooks, state management)
-            - Node.js/Express concepts (APIs, middleware, databases)
-            - General programming concepts
-            
-            Make the question clear, specific, and appropriate for {difficulty} level.
-            Return only the question text, no additional formatting.
-            """
-            
-            response = self.client.chat.completions.create(
-                model="llama-3.1-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-                temperature=0.7
-            )
+            rejected = []
+            for _ in range(self.MAX_QUESTION_ATTEMPTS):
+                question_text = self._request_question(question_number, difficulty, rejected)
+                
+                # Regenerate when the model paraphrases a question this candidate already saw
+                if not question_text or self.question_index.is_duplicate(question_text, interview_id):
+                    rejected.append(question_text)
+                    continue
+                
+                return question_text
             
-            return response.choices[0].message.content.strip()
+            print(f"Generated only near-duplicate questions for interview {interview_id}, using fallback")
         
         except Exception as e:
             print(f"Error generating question: {e}")
-            return self._get_fallback_question(question_number, difficulty)
+        
+        return self._get_fallback_question(question_number, difficulty, interview_id)
+    
+    def _request_question(self, question_number, difficulty, rejected):
+        """Request a single question from the model"""
+        # Whole items are dropped to fit the budget, and the heading goes with the last one
+        avoid = ListField(
+            'Do not repeat or paraphrase any of these questions:',
+            [f"- {text}" for text in rejected if text]
+        )
+        
+        prompt = self.prompt_builder.build('question', """
+        Generate a technical interview question for a Full Stack Developer position (React/Node.js).
+        
+        Question Number: {question_number}
+        Difficulty: {difficulty}
+        
+        Please generate a specific, practical question that tests:
+        - React concepts (components, hooks, state management)
+        - Node.js/Express concepts (APIs, middleware, databases)
+        - General programming concepts
+        
+        Make the question clear, specific, and appropriate for {difficulty} level.
+        {avoid}
+        Return only the question text, no additional formatting.
+        """, question_number=question_number, difficulty=difficulty, avoid=avoid)
+        
+        response = self.router.complete(
+            self.client,
+            'question',
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=200,
+            temperature=0.7
+        )
+        
+        question_text = response.choices[0].message.content.strip()
+        self.prompt_builder.record_usage('question', prompt, response, question_text)
+        return question_text
     
     def score_answer(self, question, answer, difficulty):
         """Score the candidate's answer"""
         if not self.client:
-            return self._get_fallback_score(difficulty)
+            return self._get_fallback_score(question, answer, difficulty)
+        
+        # Empty or trivially short answers are not worth an LLM call
+        if self.local_scorer.is_trivial(answer):
+            return self._get_fallback_score(question, answer, difficulty)
         
         try:
-            prompt = f"""
+            prompt = self.prompt_builder.build('score', """
             Score this interview answer on a scale of 1-10.
             
             Question: {question}
@@ -75,16 +128,18 @@ class AIService:
             - Completeness of answer
             
             Return only a number between 1-10.
-            """
+            """, question=question, answer=self.prompt_builder.fit_answer(answer, 'score'), difficulty=difficulty)
             
-            response = self.client.chat.completions.create(
-                model="llama-3.1-70b-versatile",
+            response = self.router.complete(
+                self.client,
+                'score',
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=10,
                 temperature=0.3
             )
             
             score_text = response.choices[0].message.content.strip()
+            self.prompt_builder.record_usage('score', prompt, response, score_text)
             # Extract number from response
             import re
             score_match = re.search(r'\d+', score_text)
@@ -92,11 +147,11 @@ class AIService:
                 score = float(score_match.group())
                 return min(max(score, 1), 10)  # Clamp between 1-10
             
-            return self._get_fallback_score(difficulty)
+            return self._get_fallback_score(question, answer, difficulty)
         
         except Exception as e:
             print(f"Error scoring answer: {e}")
-            return self._get_fallback_score(difficulty)
+            return self._get_fallback_score(question, answer, difficulty)
     
     def generate_summary(self, interview_data):
         """Generate a summary of the candidate's performance using actual interview data"""
@@ -109,30 +164,15 @@ class AIService:
             final_score = interview_data.get('final_score', 0)
             questions_answers = interview_data.get('questions_answers', [])
             
-            # Build detailed prompt with actual interview data
-            prompt = f"""
+            template = """
             Generate a comprehensive interview summary for {candidate_name} who scored {final_score}/10.
             
             Interview Details:
             - Final Score: {final_score}/10
-            - Total Questions: {len(questions_answers)}
+            - Total Questions: {total_questions}
             
             Question-by-Question Performance:
-            """
-            
-            for i, qa in enumerate(questions_answers, 1):
-                question = qa.get('question', '')
-                answer = qa.get('answer', '')
-                score = qa.get('score', 0)
-                difficulty = qa.get('difficulty', 'unknown')
-                
-                prompt += f"""
-            Q{i} ({difficulty.upper()}): {question}
-            Answer: {answer}
-            Score: {score}/10
-            """
-            
-            prompt += """
+            {performance}
             
             Please provide a professional summary including:
             1. Overall assessment of technical knowledge
@@ -144,20 +184,48 @@ class AIService:
             Keep it concise but comprehensive (200-300 words).
             """
             
-            response = self.client.chat.completions.create(
-                model="llama-3.1-70b-versatile",
+            # Reserve room for the template and question text, then share the rest between answers
+            reserved_tokens = self.prompt_builder.estimate_tokens(self.prompt_builder.clean(template))
+            reserved_tokens += sum(self.prompt_builder.estimate_tokens(qa.get('question', '')) + 10 for qa in questions_answers)
+            answers = self.prompt_builder.fit_answers(
+                [qa.get('answer', '') for qa in questions_answers], 'summary', reserved_tokens
+            )
+            
+            performance = []
+            for i, (qa, answer) in enumerate(zip(questions_answers, answers), 1):
+                question = qa.get('question', '')
+                score = qa.get('score', 0)
+                difficulty = qa.get('difficulty', 'unknown')
+                
+                performance.append(f"Q{i} ({difficulty.upper()}): {question}\nAnswer: {answer}\nScore: {score}/10\n")
+            
+            # Build detailed prompt with actual interview data
+            prompt = self.prompt_builder.build(
+                'summary',
+                template,
+                candidate_name=candidate_name,
+                final_score=final_score,
+                total_questions=len(questions_answers),
+                performance='\n'.join(performance)
+            )
+            
+            response = self.router.complete(
+                self.client,
+                'summary',
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=400,
                 temperature=0.5
             )
             
-            return response.choices[0].message.content.strip()
+            summary = response.choices[0].message.content.strip()
+            self.prompt_builder.record_usage('summary', prompt, response, summary)
+            return summary
         
         except Exception as e:
             print(f"Error generating summary: {e}")
             return f"Interview completed successfully. {candidate_name} scored {final_score}/10. Detailed analysis requires AI service."
     
-    def _get_fallback_question(self, question_number, difficulty):
+    def _get_fallback_question(self, question_number, difficulty, interview_id=None):
         """Fallback questions when AI is not available"""
         questions = {
             'easy': [
@@ -182,14 +250,15 @@ class AIService:
         
         question_list = questions.get(difficulty, questions['easy'])
         index = (question_number - 1) % len(question_list)
+        
+        # Skip fallback questions this interview has already seen
+        for offset in range(len(question_list)):
+            candidate = question_list[(index + offset) % len(question_list)]
+            if not self.question_index.is_duplicate(candidate, interview_id):
+                return candidate
+        
         return question_list[index]
     
-    def _get_fallback_score(self, difficulty):
+    def _get_fallback_score(self, question, answer, difficulty):
         """Fallback scoring when AI is not available"""
-        import random
-        if difficulty == 'easy':
-            return round(random.uniform(6, 8), 1)
-        elif difficulty == 'medium':
-            return round(random.uniform(5, 7), 1)
-        else:
-            return round(random.uniform(4, 6), 1)
+        return self.local_scorer.score(question, answer, difficulty)
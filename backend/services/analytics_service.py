@@ -0,0 +1,164 @@
+import bisect
+import threading
+
+
+class ScoreHistogram:
+    # Scores are clamped to 0-10 and bucketed at 0.1 resolution
+    BUCKETS = 101
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.score_total = 0.0
+        self.time_total = 0
+
+    def add(self, score, time_taken):
+        bucket = min(max(int(round(score * 10)), 0), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.score_total += score
+        self.time_total += time_taken or 0
+
+    def percentile(self, percentile):
+        """Get a score percentile from the histogram"""
+        if not self.count:
+            return None
+        target = max(1, percentile / 100 * self.count)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return bucket / 10
+        return (self.BUCKETS - 1) / 10
+
+    def to_dict(self):
+        if not self.count:
+            return {'count': 0, 'mean_score': None, 'p50': None, 'p90': None, 'p99': None, 'avg_time_taken': None}
+        return {
+            'count': self.count,
+            'mean_score': round(self.score_total / self.count, 2),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'avg_time_taken': round(self.time_total / self.count, 1)
+        }
+
+
+class AnalyticsService:
+    DIFFICULTIES = ('easy', 'medium', 'hard')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._difficulty_stats = {difficulty: ScoreHistogram() for difficulty in self.DIFFICULTIES}
+        self._overall = ScoreHistogram()
+
+        # interview_id -> {question_id: score of the question's first answer}
+        self._interview_scores = {}
+        # interview_id -> candidate_id
+        self._interview_candidates = {}
+        # candidate_id -> leaderboard entry for the candidate's latest interview
+        self._entries = {}
+        # Sorted (-final_score, candidate_id) keys, best first
+        self._ranking = []
+
+    def load(self, candidates, interviews, answers):
+        """Rebuild the materialized state from the database
+
+        candidates: iterable of Candidate rows
+        interviews: iterable of Interview rows, oldest first
+        answers: iterable of (interview_id, question_id, difficulty, score, time_taken)
+            tuples, oldest first
+        """
+        with self._lock:
+            self._reset()
+
+        candidates_by_id = {candidate.id: candidate for candidate in candidates}
+        for interview in interviews:
+            self.interview_started(candidates_by_id[interview.candidate_id], interview)
+        for interview_id, question_id, difficulty, score, time_taken in answers:
+            self.answer_recorded(interview_id, question_id, difficulty, score, time_taken)
+
+    def _interview_score(self, interview_id):
+        scores = self._interview_scores.get(interview_id)
+        return round(sum(scores.values()) / len(scores), 2) if scores else 0
+
+    def _set_entry_score(self, entry, final_score):
+        key = (-entry['final_score'], entry['id'])
+        index = bisect.bisect_left(self._ranking, key)
+        if index < len(self._ranking) and self._ranking[index] == key:
+            self._ranking.pop(index)
+        entry['final_score'] = final_score
+        bisect.insort(self._ranking, (-final_score, entry['id']))
+
+    def interview_started(self, candidate, interview):
+        """Make a newly started interview the candidate's leaderboard entry"""
+        with self._lock:
+            entry = self._entries.get(candidate.id)
+            if entry is None:
+                entry = {'id': candidate.id, 'final_score': 0}
+                self._entries[candidate.id] = entry
+                bisect.insort(self._ranking, (0, candidate.id))
+
+            entry.update({
+                'name': candidate.name,
+                'email': candidate.email,
+                'phone': candidate.phone,
+                'interview_id': interview.id,
+                'status': interview.status,
+                'completed_at': interview.completed_at.isoformat() if interview.completed_at else None
+            })
+            self._interview_scores.setdefault(interview.id, {})
+            self._interview_candidates[interview.id] = candidate.id
+            self._set_entry_score(entry, self._interview_score(interview.id))
+
+    def answer_recorded(self, interview_id, question_id, difficulty, score, time_taken):
+        """Fold a newly written answer into the aggregates and the leaderboard
+
+        Like Interview.calculate_final_score, only the first answer to each
+        question counts; later answers to the same question are ignored.
+        """
+        with self._lock:
+            scores = self._interview_scores.setdefault(interview_id, {})
+            if question_id in scores:
+                return
+            scores[question_id] = score
+
+            stats = self._difficulty_stats.get(difficulty)
+            if stats is not None:
+                stats.add(score, time_taken)
+            self._overall.add(score, time_taken)
+
+            # Only the candidate's latest interview is ranked
+            entry = self._entries.get(self._interview_candidates.get(interview_id))
+            if entry is not None and entry['interview_id'] == interview_id:
+                self._set_entry_score(entry, self._interview_score(interview_id))
+
+    def interview_updated(self, candidate_id, interview):
+        """Refresh a candidate's entry after their latest interview changed status"""
+        with self._lock:
+            entry = self._entries.get(candidate_id)
+            if entry is None or entry['interview_id'] != interview.id:
+                return
+            entry['status'] = interview.status
+            entry['completed_at'] = interview.completed_at.isoformat() if interview.completed_at else None
+
+    def top(self, k=None):
+        """Get the top-k leaderboard entries, highest score first"""
+        with self._lock:
+            keys = self._ranking if k is None else self._ranking[:k]
+            return [dict(self._entries[candidate_id]) for _, candidate_id in keys]
+
+    def get_summary(self):
+        """Get overall and per-difficulty score aggregates"""
+        with self._lock:
+            return {
+                'total_candidates': len(self._entries),
+                'total_answers': self._overall.count,
+                'overall': self._overall.to_dict(),
+                'by_difficulty': {
+                    difficulty: stats.to_dict() for difficulty, stats in self._difficulty_stats.items()
+                }
+            }
@@ -0,0 +1,209 @@
+import re
+import zlib
+import numpy as np
+
+# Reference concepts expected in a good answer to each fallback question
+REFERENCE_CONCEPTS = {
+    "What is React and what are its main advantages?": [
+        "library", "ui", "component", "virtual", "dom", "declarative", "reusable",
+        "state", "jsx", "performance", "ecosystem", "facebook", "render", "unidirectional"
+    ],
+    "Explain the difference between state and props in React.": [
+        "state", "props", "immutable", "mutable", "parent", "child", "component",
+        "setstate", "usestate", "pass", "internal", "read", "only", "render"
+    ],
+    "What is Node.js and what is it commonly used for?": [
+        "javascript", "runtime", "v8", "server", "event", "loop", "non", "blocking",
+        "asynchronous", "api", "npm", "io", "backend", "single", "thread"
+    ],
+    "What is the difference between GET and POST HTTP methods?": [
+        "get", "post", "request", "body", "url", "query", "idempotent", "cache",
+        "retrieve", "create", "submit", "data", "safe", "parameters", "server"
+    ],
+    "How would you implement state management in a large React application?": [
+        "redux", "context", "store", "reducer", "action", "global", "state", "zustand",
+        "mobx", "prop", "drilling", "selector", "middleware", "immutable", "usereducer"
+    ],
+    "Explain the concept of middleware in Express.js and provide an example.": [
+        "middleware", "request", "response", "next", "function", "pipeline", "express",
+        "app", "use", "logging", "authentication", "error", "handler", "order", "chain"
+    ],
+    "How would you handle authentication in a Node.js application?": [
+        "jwt", "token", "session", "cookie", "password", "hash", "bcrypt", "oauth",
+        "passport", "middleware", "expiry", "refresh", "secure", "https", "authorization"
+    ],
+    "What are React hooks and how do they differ from class components?": [
+        "hooks", "usestate", "useeffect", "function", "class", "lifecycle", "state",
+        "componentdidmount", "this", "custom", "rules", "reuse", "logic", "usecontext"
+    ],
+    "Design a scalable architecture for a real-time chat application using React and Node.js.": [
+        "websocket", "socket", "io", "redis", "pub", "sub", "load", "balancer", "horizontal",
+        "scaling", "database", "message", "queue", "presence", "sticky", "sessions", "cache"
+    ],
+    "How would you implement server-side rendering (SSR) in a React application?": [
+        "server", "render", "rendertostring", "hydrate", "next", "js", "seo", "express",
+        "initial", "html", "data", "fetching", "client", "bundle", "hydration", "state"
+    ],
+    "Explain the event loop in Node.js and how it handles asynchronous operations.": [
+        "event", "loop", "call", "stack", "callback", "queue", "microtask", "promise",
+        "libuv", "phases", "timers", "poll", "non", "blocking", "single", "thread", "nexttick"
+    ],
+    "How would you optimize the performance of a React application with thousands of components?": [
+        "memo", "usememo", "usecallback", "virtualization", "windowing", "lazy", "loading",
+        "code", "splitting", "profiler", "rerender", "key", "purecomponent", "bundle", "state"
+    ]
+}
+
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are", "was",
+    "be", "it", "that", "this", "as", "at", "by", "from", "what", "how", "would", "you", "your",
+    "do", "does", "i", "we", "they", "can", "will", "explain", "describe", "difference",
+    "between", "its", "their", "using", "use", "provide", "implement", "question",
+    "application", "app", "example", "concept", "work", "works", "about", "which", "when"
+}
+
+# Suffixes stripped so "debouncing" and "debounce", or "hooks" and "hook", match
+SUFFIXES = ('ing', 'ed', 'es', 's', 'e')
+
+
+class LocalScorer:
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    # Answers with fewer tokens than this are not worth an LLM call
+    MIN_TOKENS = 3
+
+    # Generated questions are rarely repeated, so keep the query cache small
+    QUERY_CACHE_SIZE = 1024
+
+    # Terms are hashed into a fixed space so questions outside the reference sets
+    # are scored against their own words
+    HASH_DIM = 1 << 14
+
+    # Expected answer length (in tokens) per difficulty, used for length normalisation and completeness
+    EXPECTED_LENGTH = {
+        'easy': 25,
+        'medium': 50,
+        'hard': 80
+    }
+
+    def __init__(self, reference_concepts=None):
+        self.token_pattern = re.compile(r'[a-z0-9]+')
+        self.references = {}
+        for question, concepts in (reference_concepts or REFERENCE_CONCEPTS).items():
+            self.references[self._normalize(question)] = {self._stem(term) for term in concepts}
+
+        self._build_vocabulary()
+
+    def _normalize(self, text):
+        return ' '.join(self.tokenize(text))
+
+    def tokenize(self, text):
+        """Split text into lowercase alphanumeric tokens"""
+        return self.token_pattern.findall((text or '').lower())
+
+    def _stem(self, token):
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+                return token[:-len(suffix)]
+        return token
+
+    def _index(self, term):
+        """Map a stemmed term into the hashed term space"""
+        return zlib.crc32(term.encode('utf-8')) % self.HASH_DIM
+
+    def _build_vocabulary(self):
+        """Build IDF weights over all reference sets in the hashed term space"""
+        concept_sets = list(self.references.values())
+
+        # Concepts shared by many questions say less about a specific answer;
+        # terms outside every reference set get the weight of a unique term
+        document_frequency = np.zeros(self.HASH_DIM, dtype=np.float64)
+        for concepts in concept_sets:
+            for index in {self._index(term) for term in concepts}:
+                document_frequency[index] += 1
+
+        total = len(concept_sets)
+        self.idf = np.log(1.0 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        self._query_cache = {}
+
+    def _query_vector(self, question):
+        """Get the weighted concept vector for a question"""
+        key = self._normalize(question)
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        query = np.zeros(self.HASH_DIM, dtype=np.float64)
+        concepts = self.references.get(key)
+        if concepts is None:
+            # Unknown question: score against its own content words, not a generic
+            # keyword list that any answer could stuff
+            concepts = {self._stem(term) for term in self.tokenize(question) if term not in STOP_WORDS and len(term) > 2}
+
+        for term in concepts:
+            query[self._index(term)] = 1.0
+
+        query *= self.idf
+        if len(self._query_cache) >= self.QUERY_CACHE_SIZE:
+            self._query_cache.clear()
+        self._query_cache[key] = query
+        return query
+
+    def _term_matrix(self, answers):
+        """Build an (answers x hashed terms) term-frequency matrix and answer lengths"""
+        matrix = np.zeros((len(answers), self.HASH_DIM), dtype=np.float64)
+        lengths = np.zeros(len(answers), dtype=np.float64)
+
+        for row, answer in enumerate(answers):
+            tokens = self.tokenize(answer)
+            lengths[row] = len(tokens)
+            indexes = [self._index(self._stem(token)) for token in tokens]
+            if indexes:
+                np.add.at(matrix[row], indexes, 1.0)
+
+        return matrix, lengths
+
+    def is_trivial(self, answer):
+        """Check whether an answer is empty or too short to be worth scoring"""
+        return len(self.tokenize(answer)) < self.MIN_TOKENS
+
+    def score_batch(self, items):
+        """Score many answers at once
+
+        items is a list of (question, answer, difficulty) tuples. Returns a
+        list of scores between 1 and 10 in the same order.
+        """
+        if not items:
+            return []
+
+        questions, answers, difficulties = zip(*items)
+        matrix, lengths = self._term_matrix(answers)
+        queries = np.vstack([self._query_vector(question) for question in questions])
+
+        # BM25 term saturation, normalised against a fixed expected length per difficulty
+        # so an answer's score never depends on the other answers in the batch
+        expected = np.array([self.EXPECTED_LENGTH.get(d, self.EXPECTED_LENGTH['medium']) for d in difficulties], dtype=np.float64)
+        norm = self.K1 * (1 - self.B + self.B * (lengths / expected))
+        saturated = matrix * (self.K1 + 1) / (matrix + norm[:, None])
+
+        relevance = (saturated * queries).sum(axis=1)
+        # Best possible relevance: every concept mentioned once in an answer of the expected length
+        best = queries.sum(axis=1) * (self.K1 + 1) / (1 + self.K1)
+        coverage = np.divide(relevance, best, out=np.zeros_like(relevance), where=best > 0)
+        # Covering about half of the reference concepts counts as a full answer
+        coverage = np.clip(coverage * 2, 0, 1)
+
+        # Length only earns credit in proportion to how on-topic the answer is
+        completeness = np.clip(lengths / expected, 0, 1)
+
+        scores = 1 + 9 * coverage * (0.75 + 0.25 * completeness)
+        scores[lengths < self.MIN_TOKENS] = 1.0
+
+        return [round(float(score), 1) for score in scores]
+
+    def score(self, question, answer, difficulty):
+        """Score a single answer between 1 and 10"""
+        return self.score_batch([(question, answer, difficulty)])[0]
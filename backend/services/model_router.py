@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Model tiers available on Groq
+MODEL_TIERS = {
+    'large': 'llama-3.1-70b-versatile',
+    'fast': 'llama-3.1-8b-instant'
+}
+
+# Default tier per call type; score only needs a short numeric reply
+DEFAULT_ROUTES = {
+    'question': 'large',
+    'score': 'fast',
+    'summary': 'large'
+}
+
+
+class ModelRouter:
+    # Latency samples kept per route
+    HISTORY_SIZE = 200
+
+    # Samples needed before the percentile is trusted over the default delay
+    MIN_SAMPLES = 20
+
+    def __init__(self, routes=None, hedge=None, hedge_percentile=None, hedge_default_delay=None, max_in_flight=None):
+        self.routes = dict(DEFAULT_ROUTES)
+        for call_type in DEFAULT_ROUTES:
+            tier = os.getenv(f'GROQ_MODEL_{call_type.upper()}')
+            if tier:
+                self.routes[call_type] = tier
+        if routes:
+            self.routes.update(routes)
+
+        if hedge is None:
+            hedge = os.getenv('GROQ_HEDGE_REQUESTS', '').lower() in ('1', 'true', 'yes')
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile or float(os.getenv('GROQ_HEDGE_PERCENTILE', 95))
+        self.hedge_default_delay = hedge_default_delay or float(os.getenv('GROQ_HEDGE_DELAY', 2.0))
+
+        self._latencies = {}
+        self._hedges = {}
+        self._hedge_wins = {}
+        self._lock = threading.Lock()
+        
+        # Each hedged call can hold two threads (the loser keeps running), so size the
+        # pool at twice the in-flight cap to keep new primaries from queueing behind losers
+        max_in_flight = max_in_flight or int(os.getenv('MAX_LLM_IN_FLIGHT', 8))
+        self._executor = ThreadPoolExecutor(max_workers=2 * max_in_flight, thread_name_prefix='llm')
+
+    def model_for(self, call_type):
+        """Get the model name for a call type"""
+        tier = self.routes.get(call_type, 'large')
+        return MODEL_TIERS.get(tier, tier)
+
+    def _record(self, call_type, latency):
+        with self._lock:
+            samples = self._latencies.setdefault(call_type, deque(maxlen=self.HISTORY_SIZE))
+            samples.append(latency)
+
+    def _percentile(self, samples, percentile):
+        ordered = sorted(samples)
+        index = min(int(round(percentile / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def hedge_delay(self, call_type):
+        """Get how long to wait on the primary request before hedging"""
+        with self._lock:
+            samples = list(self._latencies.get(call_type, ()))
+        if len(samples) < self.MIN_SAMPLES:
+            return self.hedge_default_delay
+        return self._percentile(samples, self.hedge_percentile)
+
+    def _call(self, client, model, messages, max_tokens, temperature):
+        return client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    def complete(self, client, call_type, messages, max_tokens, temperature):
+        """Run a chat completion on the model routed for the call type
+
+        With hedging enabled, a second request goes to the fast tier when
+        the primary exceeds the route's latency percentile, and whichever
+        returns first wins.
+        """
+        model = self.model_for(call_type)
+        hedge_model = MODEL_TIERS['fast']
+        started = time.perf_counter()
+
+        if not self.hedge or model == hedge_model:
+            response = self._call(client, model, messages, max_tokens, temperature)
+            self._record(call_type, time.perf_counter() - started)
+            return response
+
+        primary = self._executor.submit(self._call, client, model, messages, max_tokens, temperature)
+        done, _ = wait([primary], timeout=self.hedge_delay(call_type))
+        pending = {primary}
+
+        hedged = None
+        if not done:
+            with self._lock:
+                self._hedges[call_type] = self._hedges.get(call_type, 0) + 1
+            hedged = self._executor.submit(self._call, client, hedge_model, messages, max_tokens, temperature)
+            pending.add(hedged)
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The losing request is left to finish in the background
+                    self._record(call_type, time.perf_counter() - started)
+                    if future is hedged:
+                        with self._lock:
+                            self._hedge_wins[call_type] = self._hedge_wins.get(call_type, 0) + 1
+                    return future.result()
+                error = future.exception()
+
+        self._record(call_type, time.perf_counter() - started)
+        raise error
+
+    def get_latency_stats(self):
+        """Get per-route latency percentiles (in seconds) and hedge counts
+
+        model is the route's primary model; hedge_wins counts the calls
+        answered by hedge_model instead.
+        """
+        with self._lock:
+            latencies = {call_type: list(samples) for call_type, samples in self._latencies.items()}
+            hedges = dict(self._hedges)
+            hedge_wins = dict(self._hedge_wins)
+
+        stats = {}
+        for call_type, samples in latencies.items():
+            if not samples:
+                continue
+            stats[call_type] = {
+                'model': self.model_for(call_type),
+                'count': len(samples),
+                'p50': round(self._percentile(samples, 50), 3),
+                'p95': round(self._percentile(samples, 95), 3),
+                'p99': round(self._percentile(samples, 99), 3),
+                'hedged': hedges.get(call_type, 0),
+                'hedge_model': MODEL_TIERS['fast'],
+                'hedge_wins': hedge_wins.get(call_type, 0)
+            }
+        return stats
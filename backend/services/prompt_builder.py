@@ -0,0 +1,215 @@
+import re
+import textwrap
+import threading
+from collections import deque, namedtuple
+
+# A prompt field made of whole items under a heading; the heading is dropped with the last item
+ListField = namedtuple('ListField', ['header', 'items'])
+
+
+class PromptBuilder:
+    # Rough heuristic for English text with Llama-style tokenizers
+    CHARS_PER_TOKEN = 4
+
+    # Per-call prompt budgets (in tokens)
+    DEFAULT_BUDGETS = {
+        'question': 300,
+        'score': 700,
+        'summary': 2500
+    }
+
+    # Budget for a single answer embedded in a prompt
+    DEFAULT_ANSWER_BUDGET = {
+        'score': 500,
+        'summary': 250
+    }
+
+    TRUNCATION_MARKER = ' [...truncated...] '
+
+    def __init__(self, budgets=None, answer_budgets=None, history_size=500):
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+
+        self.answer_budgets = dict(self.DEFAULT_ANSWER_BUDGET)
+        if answer_budgets:
+            self.answer_budgets.update(answer_budgets)
+
+        # Recent calls only; the running totals below cover every call
+        self._usage = deque(maxlen=history_size)
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def estimate_tokens(self, text):
+        """Estimate the number of tokens in a piece of text"""
+        if not text:
+            return 0
+        return max(1, (len(text) + self.CHARS_PER_TOKEN - 1) // self.CHARS_PER_TOKEN)
+
+    def clean(self, template):
+        """Strip the template's indentation and collapse runs of blank lines"""
+        text = textwrap.dedent(template).strip()
+        lines = [line.strip() for line in text.splitlines()]
+        text = '\n'.join(lines)
+        return re.sub(r'\n{3,}', '\n\n', text)
+
+    def truncate(self, text, max_tokens):
+        """Truncate text to a token budget, keeping its beginning and end"""
+        if not text:
+            return ''
+
+        # Text under budget keeps its layout (code answers rely on line breaks)
+        if self.estimate_tokens(text) <= max_tokens:
+            return text
+
+        text = ' '.join(text.split())
+        if self.estimate_tokens(text) <= max_tokens:
+            return text
+
+        max_chars = max_tokens * self.CHARS_PER_TOKEN - len(self.TRUNCATION_MARKER)
+        if max_chars <= 0:
+            return text[:max_tokens * self.CHARS_PER_TOKEN]
+
+        # Keep more of the head: answers usually open with the core idea
+        head_chars = (max_chars * 2) // 3
+        tail_chars = max_chars - head_chars
+        return text[:head_chars].rstrip() + self.TRUNCATION_MARKER + text[-tail_chars:].lstrip()
+
+    def fit_answer(self, answer, call_type):
+        """Fit a candidate answer into the per-answer budget for a call type"""
+        budget = self.answer_budgets.get(call_type, self.answer_budgets['score'])
+        return self.truncate(answer or '', budget)
+
+    def fit_answers(self, answers, call_type, reserved_tokens=0):
+        """Fit several answers into a shared budget for a call type
+
+        Short answers keep their full length; the remaining budget is split
+        evenly between the longer ones.
+        """
+        total_budget = max(self.budgets.get(call_type, 0) - reserved_tokens, 0)
+        per_answer = self.answer_budgets.get(call_type, self.answer_budgets['score'])
+
+        cleaned = [answer or '' for answer in answers]
+        sizes = [self.estimate_tokens(answer) for answer in cleaned]
+        if sum(sizes) <= total_budget:
+            return [self.truncate(answer, per_answer) for answer in cleaned]
+
+        remaining = total_budget
+        fitted = list(cleaned)
+
+        # Hand out budget from the shortest answer up so small ones are never cut
+        order = sorted(range(len(cleaned)), key=lambda i: sizes[i])
+        pending = len(order)
+        for index in order:
+            share = min(remaining // pending, per_answer) if pending else 0
+            fitted[index] = self.truncate(cleaned[index], share)
+            remaining -= self.estimate_tokens(fitted[index])
+            pending -= 1
+
+        return fitted
+
+    def fit_lines(self, lines, max_tokens, header=None):
+        """Keep whole lines, in order, while they fit in a token budget
+
+        A header is only kept when at least one line fits under it.
+        """
+        kept = []
+        used = self.estimate_tokens(header) + 1 if header else 0
+        for line in lines:
+            size = self.estimate_tokens(line) + 1
+            if used + size > max_tokens:
+                break
+            kept.append(line)
+            used += size
+        if kept and header:
+            kept.insert(0, header)
+        return '\n'.join(kept)
+
+    def _as_text(self, value):
+        if isinstance(value, ListField):
+            return '\n'.join([value.header] + list(value.items)) if value.items else ''
+        if isinstance(value, (list, tuple)):
+            return '\n'.join(value)
+        return str(value)
+
+    def fit_fields(self, template, budget, fields):
+        """Fit field values into what is left of the budget after the template
+
+        The smallest fields are placed first so only the largest get cut.
+        List values are fitted line by line so no item is cut in half.
+        """
+        fixed_tokens = self.estimate_tokens(template.format(**{key: '' for key in fields}))
+        remaining = max(budget - fixed_tokens, 0)
+
+        texts = {key: self._as_text(value) for key, value in fields.items()}
+        sizes = {key: self.estimate_tokens(text) for key, text in texts.items()}
+        if sum(sizes.values()) <= remaining:
+            return texts
+
+        fitted = {}
+        order = sorted(fields, key=lambda key: sizes[key])
+        pending = len(order)
+        for key in order:
+            share = remaining // pending
+            if isinstance(fields[key], ListField):
+                fitted[key] = self.fit_lines(fields[key].items, share, fields[key].header)
+            elif isinstance(fields[key], (list, tuple)):
+                fitted[key] = self.fit_lines(fields[key], share)
+            else:
+                fitted[key] = self.truncate(texts[key], share)
+            remaining -= self.estimate_tokens(fitted[key])
+            pending -= 1
+        return fitted
+
+    def build(self, call_type, template, **fields):
+        """Clean a template, fit its fields to the call type's budget and render it
+
+        Field values are inserted as-is, so line breaks in answers survive.
+        """
+        template = self.clean(template)
+        budget = self.budgets.get(call_type)
+        if budget:
+            fields = self.fit_fields(template, budget, fields)
+        return template.format(**fields)
+
+    def record_usage(self, call_type, prompt, response=None, completion=None):
+        """Record prompt/completion token counts for a finished call
+
+        Uses the usage block reported by the API when present and falls
+        back to local estimates otherwise.
+        """
+        usage = getattr(response, 'usage', None) if response is not None else None
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+
+        entry = {
+            'call_type': call_type,
+            'prompt_tokens': prompt_tokens if prompt_tokens is not None else self.estimate_tokens(prompt),
+            'completion_tokens': completion_tokens if completion_tokens is not None else self.estimate_tokens(completion),
+            'estimated': prompt_tokens is None
+        }
+
+        with self._lock:
+            self._usage.append(entry)
+            totals = self._totals.setdefault(call_type, {
+                'calls': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0
+            })
+            totals['calls'] += 1
+            totals['prompt_tokens'] += entry['prompt_tokens']
+            totals['completion_tokens'] += entry['completion_tokens']
+        return entry
+
+    def get_usage(self, call_type=None):
+        """Get the most recent usage entries (a window of history_size calls), optionally filtered by call type"""
+        with self._lock:
+            entries = list(self._usage)
+        if call_type:
+            entries = [entry for entry in entries if entry['call_type'] == call_type]
+        return entries
+
+    def get_usage_totals(self):
+        """Get total prompt/completion tokens per call type since startup"""
+        with self._lock:
+            return {call_type: dict(totals) for call_type, totals in self._totals.items()}
@@ -0,0 +1,114 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+
+class QuestionIndex:
+    # MinHash signature length
+    NUM_PERM = 64
+
+    # Character shingle size
+    SHINGLE_SIZE = 5
+
+    # Estimated Jaccard similarity above which two questions count as near-duplicates
+    DEFAULT_THRESHOLD = 0.5
+
+    # Mersenne prime for the universal hash family
+    PRIME = (1 << 31) - 1
+
+    # Interviews untouched for this long are treated as abandoned and evicted
+    IDLE_SECONDS = 24 * 3600
+
+    # Upper bound on interviews tracked at once
+    MAX_INTERVIEWS = 10000
+
+    def __init__(self, threshold=None, seed=42):
+        self.threshold = threshold if threshold is not None else self.DEFAULT_THRESHOLD
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, self.PRIME, size=self.NUM_PERM, dtype=np.int64)
+        self._b = rng.randint(0, self.PRIME, size=self.NUM_PERM, dtype=np.int64)
+
+        # The index is scoped per interview rather than global: it stops a candidate
+        # seeing near-repeats within their interview, and an interview has at most a
+        # handful of questions, so each lookup compares exactly against just those.
+        # interview_id -> (last used, [(text, signature)]), least recently used first
+        self._interviews = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for _, entries in self._interviews.values())
+
+    def _shingles(self, text):
+        """Get the set of character shingles of a normalized question"""
+        normalized = ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+        if len(normalized) <= self.SHINGLE_SIZE:
+            return {normalized} if normalized else set()
+        return {normalized[i:i + self.SHINGLE_SIZE] for i in range(len(normalized) - self.SHINGLE_SIZE + 1)}
+
+    def signature(self, text):
+        """Compute the MinHash signature of a question"""
+        shingles = self._shingles(text)
+        if not shingles:
+            return np.full(self.NUM_PERM, self.PRIME, dtype=np.int64)
+
+        # crc32 fits in 32 bits, so a * x stays within int64
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.int64, count=len(shingles))
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % self.PRIME
+        return permuted.min(axis=1)
+
+    def add(self, text, interview_id=None):
+        """Add an issued question to its interview's entries"""
+        signature = self.signature(text)
+        now = time.monotonic()
+        with self._lock:
+            _, entries = self._interviews.pop(interview_id, (now, []))
+            entries.append((text, signature))
+            self._interviews[interview_id] = (now, entries)
+            self._evict(now)
+
+    def _evict(self, now):
+        """Drop abandoned interviews and keep the number tracked bounded"""
+        while self._interviews:
+            last_used, _ = next(iter(self._interviews.values()))
+            if len(self._interviews) <= self.MAX_INTERVIEWS and now - last_used < self.IDLE_SECONDS:
+                break
+            self._interviews.popitem(last=False)
+
+    def add_many(self, questions):
+        """Add (text, interview_id) pairs to the index"""
+        for text, interview_id in questions:
+            self.add(text, interview_id)
+
+    def remove(self, interview_id):
+        """Drop an interview's questions once it can no longer be issued new ones"""
+        with self._lock:
+            self._interviews.pop(interview_id, None)
+
+    def find_similar(self, text, interview_id=None, threshold=None):
+        """Find the most similar question issued in an interview above the threshold
+
+        Returns (text, similarity) or None.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signature = self.signature(text)
+
+        with self._lock:
+            _, entries = self._interviews.get(interview_id, (None, []))
+            entries = list(entries)
+
+        best = None
+        for indexed_text, indexed_signature in entries:
+            similarity = float(np.mean(indexed_signature == signature))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (indexed_text, similarity)
+
+        return best
+
+    def is_duplicate(self, text, interview_id=None, threshold=None):
+        """Check whether a question is a near-duplicate of one issued in the interview"""
+        return self.find_similar(text, interview_id, threshold) is not None
@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """Take a token; returns 0 on success or the seconds until one is available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    # Buckets idle for this long are dropped to keep memory bounded
+    IDLE_SECONDS = 600
+
+    def __init__(self, limits=None, max_in_flight=8, max_keys=10000):
+        # scope -> (requests per second, burst capacity)
+        self.limits = limits or {
+            'ip': (0.5, 10),
+            # start-interview has no interview yet, so it is limited per candidate email
+            'candidate': (0.05, 3),
+            'interview': (0.2, 6)
+        }
+        self.max_in_flight = max_in_flight
+        self.max_keys = max_keys
+
+        self._buckets = OrderedDict()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def check(self, scope, key):
+        """Take a token for a key in a scope
+
+        Returns 0 when the request may proceed, otherwise the number of
+        seconds the client should wait before retrying.
+        """
+        rate, capacity = self.limits[scope]
+        now = time.monotonic()
+
+        with self._lock:
+            bucket_key = (scope, key)
+            bucket = self._buckets.pop(bucket_key, None)
+            if bucket is None:
+                bucket = TokenBucket(rate, capacity)
+            self._buckets[bucket_key] = bucket
+            self._evict(now)
+            return bucket.take(now)
+
+    def _evict(self, now):
+        while self._buckets:
+            oldest_key, oldest = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - oldest.updated < self.IDLE_SECONDS:
+                break
+            del self._buckets[oldest_key]
+
+    def acquire(self):
+        """Reserve an in-flight slot for an LLM-backed request"""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        """Release an in-flight slot"""
+        with self._lock:
+            self._in_flight = max(self._in_flight - 1, 0)
+
+    @staticmethod
+    def retry_after(seconds):
+        """Format a wait time for the Retry-After header"""
+        return str(max(1, math.ceil(seconds)))
+
+
+class IdempotencyStore:
+    PENDING = object()
+
+    def __init__(self, ttl_seconds=3600, max_entries=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Claim a key before doing the work
+
+        Returns (True, None) when the caller should do the work,
+        (False, result) when a stored result exists, and (False, PENDING)
+        when the same request is still being processed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                return False, entry[1]
+
+            self._entries[key] = (now, self.PENDING)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True, None
+
+    def complete(self, key, result):
+        """Store the result for a claimed key"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+
+    def abandon(self, key):
+        """Release a claimed key after a failure so the request can be retried"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is self.PENDING:
+                del self._entries[key]
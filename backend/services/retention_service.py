@@ -0,0 +1,121 @@
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models.database import db
+from models.interview import Interview
+from models.question import Question
+from models.answer import Answer
+from models.interview_archive import InterviewArchive
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class RetentionService:
+    # Interviews archived per transaction
+    BATCH_SIZE = 50
+
+    def __init__(self, max_age_days=None, interval_hours=None):
+        self.max_age_days = max_age_days or int(os.getenv('INTERVIEW_RETENTION_DAYS', 90))
+        self.interval_hours = interval_hours or float(os.getenv('RETENTION_INTERVAL_HOURS', 24))
+        self.codec = 'zstd' if zstandard else 'zlib'
+
+    def _compress(self, data):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return zlib.compress(data, 9)
+
+    def _decompress(self, codec, payload):
+        if codec == 'zstd':
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read this archive")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
+
+    def archive_old_interviews(self):
+        """Move text of completed interviews older than the retention age into the archive table"""
+        cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+        archived = 0
+
+        while True:
+            interviews = Interview.query.outerjoin(
+                InterviewArchive, InterviewArchive.interview_id == Interview.id
+            ).filter(
+                Interview.status == 'completed',
+                Interview.completed_at < cutoff,
+                InterviewArchive.id.is_(None)
+            ).limit(self.BATCH_SIZE).all()
+
+            if not interviews:
+                return archived
+
+            for interview in interviews:
+                self._archive_interview(interview)
+                archived += 1
+            db.session.commit()
+
+    def _archive_interview(self, interview):
+        """Compress an interview's text into an archive row and blank it in the hot tables"""
+        questions = Question.query.filter_by(interview_id=interview.id).all()
+        answers = Answer.query.filter(Answer.question_id.in_([q.id for q in questions])).all() if questions else []
+
+        data = json.dumps({
+            'summary': interview.summary,
+            'questions': {str(q.id): q.question_text for q in questions},
+            'answers': {str(a.id): a.answer_text for a in answers}
+        }, separators=(',', ':')).encode('utf-8')
+
+        db.session.add(InterviewArchive(
+            interview_id=interview.id,
+            codec=self.codec,
+            payload=self._compress(data),
+            original_size=len(data)
+        ))
+
+        # Scores, difficulties and timings stay hot; only the text moves
+        interview.summary = None
+        for question in questions:
+            question.question_text = ''
+        for answer in answers:
+            answer.answer_text = ''
+
+    def load_archive(self, interview_id):
+        """Get the archived text of an interview, or None if it is not archived"""
+        archive = InterviewArchive.query.filter_by(interview_id=interview_id).first()
+        if not archive:
+            return None
+
+        data = json.loads(self._decompress(archive.codec, archive.payload).decode('utf-8'))
+        return {
+            'summary': data.get('summary'),
+            'questions': {int(k): v for k, v in data.get('questions', {}).items()},
+            'answers': {int(k): v for k, v in data.get('answers', {}).items()}
+        }
+
+    def compact(self):
+        """Reclaim space freed by archiving (SQLite only)"""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+
+        # VACUUM cannot run inside a transaction
+        with db.engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+        return True
+
+    def run(self):
+        """Archive old interviews and compact the database if anything moved"""
+        try:
+            archived = self.archive_old_interviews()
+            if archived:
+                db.session.remove()
+                self.compact()
+                print(f"Archived {archived} interviews older than {self.max_age_days} days")
+            return archived
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error running retention: {e}")
+            return 0
@@ -0,0 +1,81 @@
+import gzip
+import json
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Payloads smaller than this are not worth compressing
+COMPRESSION_THRESHOLD = 1024
+
+
+def dumps(payload):
+    """Serialize a payload to JSON bytes with the fastest available encoder"""
+    if orjson:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def requested_fields():
+    """Get the sparse fieldset from ?fields=a,b,c, or None for all fields"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()}
+
+
+def select_fields(record, fields, always=('id',)):
+    """Keep only the requested keys of a record, plus the keys that identify it"""
+    if fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in fields or key in always}
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the best supported content encoding from an Accept-Encoding header"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    if brotli and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def json_response(payload, status=200):
+    """Build a JSON response, compressed when the client accepts it and the body is large"""
+    body = dumps(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+
+    if len(body) >= COMPRESSION_THRESHOLD:
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding:
+            body = compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+
+    return Response(body, status=status, headers=headers, mimetype='application/json')